@@ -1,4 +1,202 @@
 import re as regex
+from array import array
+from itertools import groupby
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # Python 3.10 and older
+    import sre_parse
+
+
+_patterns: dict[str, regex.Pattern[str]] = {}
+
+
+def _compile(pattern: str) -> regex.Pattern[str]:
+    """Compiles `pattern` once so it can be reused by every call to `tokenize`, and by every identifier and language that shares it."""
+    compiled = _patterns.get(pattern)
+    if compiled is None:
+        compiled = _patterns[pattern] = regex.compile(pattern)
+    return compiled
+
+
+_parsed: dict[str, sre_parse.SubPattern] = {}
+
+
+def _parse(pattern: str) -> sre_parse.SubPattern:
+    """Parses `pattern` once, so that every look inside it, for every identifier and language that shares it, reuses the same tree."""
+    parsed = _parsed.get(pattern)
+    if parsed is None:
+        parsed = _parsed[pattern] = sre_parse.parse(pattern)
+    return parsed
+
+
+_Matcher = Callable[[str, int], Optional[regex.Match[str]]]
+
+_Segment = tuple[_Matcher, tuple[Optional[tuple[int, int]], ...]]
+
+_Bucket = tuple[Optional[dict[str, int]], tuple[_Segment, ...]]
+
+_WORD = _compile(r"\w+")
+
+_KEYWORD_ALTERNATION = _compile(r"\(([A-Za-z_]\w*(?:\|[A-Za-z_]\w*)*)\)\\b")
+
+
+_ASCII_CHARACTERS = frozenset(chr(code) for code in range(128))
+
+_CATEGORY_CHARACTERS = {
+    category: frozenset(filter(regex.compile(category_regex).match, _ASCII_CHARACTERS))
+    for category, category_regex in (
+        (sre_parse.CATEGORY_DIGIT, r"\d"),
+        (sre_parse.CATEGORY_NOT_DIGIT, r"\D"),
+        (sre_parse.CATEGORY_SPACE, r"\s"),
+        (sre_parse.CATEGORY_NOT_SPACE, r"\S"),
+        (sre_parse.CATEGORY_WORD, r"\w"),
+        (sre_parse.CATEGORY_NOT_WORD, r"\W"),
+    )
+}
+
+_REPEATS = tuple(getattr(sre_parse, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(sre_parse, name))
+
+
+def _first_characters(pattern: regex.Pattern[str]) -> frozenset[str]:
+    """
+    Returns the ASCII characters that a match of `pattern` can begin with. This errs on the side of including too many characters, and gives every ASCII character for anything it can't reason about.
+    """
+    if pattern.flags & regex.IGNORECASE:
+        return _ASCII_CHARACTERS
+    characters, can_be_empty = _first_characters_of(_parse(pattern.pattern))
+    if characters is None or can_be_empty:
+        return _ASCII_CHARACTERS
+    return frozenset(characters)
+
+
+def _first_characters_of(items) -> tuple[Optional[set[str]], bool]:
+    """
+    Returns the ASCII characters that a parsed sequence of regex items can begin with, or `None` if they can't be worked out, along with whether the items can match an empty string.
+    """
+    characters: set[str] = set()
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            item_characters, can_be_empty = {chr(av)}, False
+        elif op == sre_parse.NOT_LITERAL:
+            item_characters, can_be_empty = set(_ASCII_CHARACTERS) - {chr(av)}, False
+        elif op == sre_parse.IN:
+            item_characters, can_be_empty = _set_characters(av), False
+        elif op == sre_parse.SUBPATTERN:
+            if av[1] & regex.IGNORECASE:
+                return None, True
+            item_characters, can_be_empty = _first_characters_of(av[-1])
+        elif op == sre_parse.BRANCH:
+            item_characters, can_be_empty = set(), False
+            for branch in av[1]:
+                branch_characters, branch_can_be_empty = _first_characters_of(branch)
+                if branch_characters is None:
+                    return None, True
+                item_characters |= branch_characters
+                can_be_empty = can_be_empty or branch_can_be_empty
+        elif op in _REPEATS:
+            item_characters, can_be_empty = _first_characters_of(av[2])
+            can_be_empty = can_be_empty or av[0] == 0
+        elif op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            # Zero-width assertions only ever narrow down what can follow them
+            item_characters, can_be_empty = set(), True
+        else:
+            return None, True
+
+        if item_characters is None:
+            return None, True
+        characters |= item_characters
+        if not can_be_empty:
+            return characters, False
+    return characters, True
+
+
+def _set_characters(items) -> set[str]:
+    """Returns the ASCII characters matched by the items of a parsed character set such as `[a-z_]`."""
+    characters: set[str] = set()
+    negate = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            characters.add(chr(av))
+        elif op == sre_parse.RANGE:
+            characters.update(chr(code) for code in range(av[0], min(av[1], 127) + 1))
+        elif op == sre_parse.CATEGORY and av in _CATEGORY_CHARACTERS:
+            characters |= _CATEGORY_CHARACTERS[av]
+        else:
+            return set(_ASCII_CHARACTERS)
+    return set(_ASCII_CHARACTERS) - characters if negate else characters
+
+
+def _fusable(pattern: regex.Pattern[str]) -> bool:
+    """
+    Returns whether `pattern` can be wrapped in a group and joined into one alternation with other patterns. Numbered backreferences such as `\\1` would refer to the wrong group, a group name can only be defined once in a pattern, and global flags such as `(?i)` have to begin the whole pattern.
+    """
+    if pattern.groupindex or pattern.flags & ~regex.UNICODE:
+        return False
+    # Backreferences look like `\\1` or `(?(1)a|b)`
+    return not any(op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS) for op, _ in _all_items(_parse(pattern.pattern)))
+
+
+def _all_items(items) -> Iterator[tuple]:
+    """Yields every item of a parsed sequence of regex items, including the items nested inside groups, branches and repeats."""
+    for op, av in items:
+        yield op, av
+        for value in av if isinstance(av, (tuple, list)) else (av,):
+            if isinstance(value, sre_parse.SubPattern):
+                yield from _all_items(value)
+            elif isinstance(value, list):
+                for branch in value:
+                    if isinstance(branch, sre_parse.SubPattern):
+                        yield from _all_items(branch)
+
+
+def _keywords(pattern: regex.Pattern[str]) -> Optional[frozenset[str]]:
+    """Returns the words of `pattern` if it is exactly a list of words followed by a word boundary, such as `r"(if|else|while)\\b"`."""
+    keywords = _KEYWORD_ALTERNATION.fullmatch(pattern.pattern)
+    if keywords is None or pattern.flags & regex.IGNORECASE:
+        return None
+    return frozenset(keywords.group(1).split("|"))
+
+
+def _single_character(pattern: regex.Pattern[str]) -> Optional[str]:
+    """Returns `X` if `pattern` is exactly a single character `X`, such as `r"\\("`."""
+    if pattern.flags & regex.IGNORECASE:
+        return None
+    items = list(_parse(pattern.pattern))
+    if len(items) != 1 or items[0][0] != sre_parse.LITERAL:
+        return None
+    return chr(items[0][1])
+
+
+def _repeated_character(pattern: regex.Pattern[str]) -> Optional[str]:
+    """Returns `X` if `pattern` is exactly `X+` for a single character `X`, such as `r" +"`."""
+    if pattern.flags & regex.IGNORECASE:
+        return None
+    items = list(_parse(pattern.pattern))
+    if len(items) != 1 or items[0][0] != sre_parse.MAX_REPEAT:
+        return None
+    low, high, repeated = items[0][1]
+    repeated = list(repeated)
+    if low != 1 or high != sre_parse.MAXREPEAT or len(repeated) != 1 or repeated[0][0] != sre_parse.LITERAL:
+        return None
+    return chr(repeated[0][1])
+
+
+def _line_comment_prefix(pattern: regex.Pattern[str]) -> Optional[str]:
+    """Returns `prefix` if `pattern` is exactly `prefix[^\\n]*` for a literal prefix, such as `r"//[^\\n]*"`."""
+    if pattern.flags & regex.IGNORECASE:
+        return None
+    items = list(_parse(pattern.pattern))
+    if len(items) < 2 or not all(op == sre_parse.LITERAL for op, _ in items[:-1]):
+        return None
+    op, av = items[-1]
+    if op != sre_parse.MAX_REPEAT or av[0] != 0 or av[1] != sre_parse.MAXREPEAT or list(av[2]) != [(sre_parse.NOT_LITERAL, ord("\n"))]:
+        return None
+    return "".join(chr(character) for _, character in items[:-1])
 
 
 class Token:
@@ -6,6 +204,8 @@ class Token:
     A `Token` represents a single unit of code. 
     """
 
+    __slots__ = ("type", "value", "start", "line_number", "line_start", "_full_match", "_pattern", "_code")
+
     type: str
     """
     The type of token, such as `keyword` or `class name`. Certain types may only exist in certain languages, such as `preprocessor directive` for `C++`.
@@ -16,11 +216,6 @@ class Token:
     The part of the token's match that represents the actual value of the token, such as `public` for a `keyword` token. This differs from `full_match` in that some token types have to check characters around the token to correctly identify it, and those characters are not included in the value of the token itself.
     """
 
-    full_match: regex.Match[str]
-    """
-    The entire match of the token's regular expression. The exact definition of this varies from implementation to implementation, but in general it refers to the `0` group of the regular expression used to identify the token. 
-    """
-
     start: int
     """The index of the entire code block at which the first letter of this token lies."""
 
@@ -30,7 +225,7 @@ class Token:
     line_number: int
     """The line number that the token is on."""
 
-    def __init__(self, type: str, value: str, full_match: regex.Match[str], start: int, line_number: int, line_start: int):
+    def __init__(self, type: str, value: str, full_match: Optional[regex.Match[str]], start: int, line_number: int, line_start: int, pattern: Optional[regex.Pattern[str]] = None, code: str = ""):
         """
         Creates a new `Token`. 
 
@@ -40,11 +235,15 @@ class Token:
             - `value: str`:
                 - The value of the token, such as `public`. 
             - `full_match: re.Match`
-                - The full group matched by the token's regular expression.
+                - The full group matched by the token's regular expression, or `None` to match it again from `pattern` and `code` when it is first accessed.
             - `start: int`
                 - The index of the first character of this token relative to the entire code snippet.
             - `end: int`
                 - The index of the last character of this token relative to the entire code snippet. 
+            - `pattern: re.Pattern`
+                - The token's regular expression, used to rebuild `full_match` on demand.
+            - `code: str`
+                - The code snippet the token was found in, used to rebuild `full_match` on demand.
         
         ### Returns
         a new `Token` with the specified attributes.
@@ -52,10 +251,27 @@ class Token:
         """
         self.type = type
         self.value = value
-        self.full_match = full_match
+        self._full_match = full_match
         self.start = start
         self.line_number = line_number
         self.line_start = line_start
+        self._pattern = pattern
+        self._code = code
+
+    @property
+    def full_match(self) -> Optional[regex.Match[str]]:
+        """
+        The entire match of the token's regular expression. The exact definition of this varies from implementation to implementation, but in general it refers to the `0` group of the regular expression used to identify the token. 
+
+        Tokens created by `tokenize` do not keep their match around, and instead run their regular expression again the first time this is accessed.
+        """
+        if self._full_match is None and self._pattern is not None:
+            self._full_match = self._pattern.match(self._code, self.start)
+        return self._full_match
+
+    @full_match.setter
+    def full_match(self, full_match: Optional[regex.Match[str]]):
+        self._full_match = full_match
 
     def __str__(self):
         return f"Token[ type = {self.type}, value = {repr(self.value)}, start = {self.start}, line_number = {self.line_number}, line_start = {self.line_start} ]"
@@ -63,20 +279,107 @@ class Token:
 
 class TokenIdentifier:
 
+    __slots__ = ("regex", "group", "type", "_compiled")
+
     regex: str
     group: int
     type: str
 
     def __init__(self, token_type: str, regex: str, group: int = 0):
         self.regex = regex if regex.startswith("^") else f"^{regex}"
+        self._compiled: Optional[regex.Pattern[str]] = None
+
+        # `Pattern.match` is anchored at the position it is given, so any `^` after the leading one would no longer
+        # match at the start of the token, such as the one in `a|^b`
+        pattern = self.regex[1:]
+        if ("^" in pattern or "\\A" in pattern) and any(
+            op == sre_parse.AT and av in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING)
+            for op, av in _all_items(_parse(pattern))
+        ):
+            raise Exception(f"Unsupported Regex: \"{token_type}\" can only use ^ at the start of its regex")
         self.type = token_type
         self.group = group
+
+    @property
+    def compiled(self) -> regex.Pattern[str]:
+        """
+        The compiled regular expression of this identifier, without its leading `^`. It is compiled the first time it is needed, so that defining a language doesn't compile the regular expressions of every identifier straight away.
+        """
+        if self._compiled is None:
+            self._compiled = _compile(self.regex[1:])
+        return self._compiled
         
 
+class TokenStream:
+    """
+    A `TokenStream` is the compact result of tokenizing a code snippet. Rather than holding one `Token` object per token, it keeps the tokens as parallel arrays of integers, and only builds a `Token` when one is indexed or iterated over.
+    """
+
+    code: str
+    """The code snippet that was tokenized, with carriage returns removed."""
+
+    identifiers: list[TokenIdentifier]
+    """The `TokenIdentifiers` that `identifier_ids` index into."""
+
+    identifier_ids: array
+    """The index in `identifiers` of the `TokenIdentifier` that matched each token."""
+
+    starts: array
+    """The index of the entire code block at which each token begins."""
+
+    lengths: array
+    """The number of characters in each token, which is also the length of its value."""
+
+    value_starts: array
+    """The index of the entire code block at which each token's value begins. This is the same as its start unless the value is a group that the token's regex doesn't begin with."""
+
+    line_numbers: array
+    """The line number that each token is on."""
+
+    line_starts: array
+    """The index on each token's line at which it begins."""
+
+    def __init__(self, code: str, identifiers: list[TokenIdentifier]):
+        """
+        Creates a new, empty `TokenStream` over `code`, whose tokens are matched by the given `identifiers`.
+        """
+        self.code = code
+        self.identifiers = identifiers
+        self.identifier_ids = array("H")
+        self.starts = array("i")
+        self.lengths = array("i")
+        self.value_starts = array("i")
+        self.line_numbers = array("i")
+        self.line_starts = array("i")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Token, list[Token]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        identifier = self.identifiers[self.identifier_ids[index]]
+        value_start = self.value_starts[index]
+        return Token(
+            identifier.type,
+            self.code[value_start:value_start + self.lengths[index]],
+            None,
+            self.starts[index],
+            self.line_numbers[index],
+            self.line_starts[index],
+            identifier.compiled,
+            self.code
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self)):
+            yield self[index]
+
+
 class TokenizableLanguage:
 
     identifiers: list[TokenIdentifier]
-    default_identifiers = [
+    default_identifiers: tuple[TokenIdentifier, ...] = (
         TokenIdentifier("identifier", r"^[a-z_]\w*\b"),
         TokenIdentifier("left parentheses", r"^\("),
         TokenIdentifier("right parentheses", r"^\)"),
@@ -95,7 +398,7 @@ class TokenizableLanguage:
         TokenIdentifier("whitespace", r"^ +"),
         TokenIdentifier("comment", r"^//[^\n]*"),
         TokenIdentifier("comma", r",")
-    ]
+    )
 
     def __init__(self, identifiers: list[TokenIdentifier]):
         """
@@ -128,42 +431,211 @@ class TokenizableLanguage:
         self.identifiers = list(id_dict.values())
         self.identifiers.reverse()
 
-        
+        # Defaults that were overridden are kept as a last resort, after every other identifier has failed
+        self._search_order = self.identifiers + [
+            default_identifier for default_identifier in TokenizableLanguage.default_identifiers
+            if default_identifier not in self.identifiers
+        ]
+
+        # The tables that `_scan` works from are only built once the language is first used, so that defining every
+        # language stays cheap when importing this module
+        self._dispatch: Optional[dict[str, _Bucket]] = None
+
+    def _prepare(self):
+        """
+        Builds the tables that `_scan` works from: the shortcuts for common tokens and the bucket of identifiers to try at each character.
+        """
+        first_characters = [_first_characters(identifier.compiled) for identifier in self._search_order]
+        self._keyword_sets = [_keywords(identifier.compiled) for identifier in self._search_order]
+        self._fusable = [_fusable(identifier.compiled) for identifier in self._search_order]
+
+        # Only the identifiers that can begin with a character need to be tried at it, so each ASCII character gets
+        # its own bucket of just those identifiers. Characters with the same candidates share a bucket, and any
+        # other character falls back to a bucket of every identifier.
+        self._master: _Bucket = (None, self._fuse(range(len(self._search_order))))
+        buckets: dict[tuple[int, ...], _Bucket] = {}
+        dispatch: dict[str, _Bucket] = {}
+        for character in sorted(_ASCII_CHARACTERS):
+            candidates = tuple(identifier_id for identifier_id, characters in enumerate(first_characters) if character in characters)
+            if candidates:
+                if candidates not in buckets:
+                    buckets[candidates] = self._bucket(candidates)
+                dispatch[character] = buckets[candidates]
+
+        # Single characters (such as parentheses), runs of one character (such as whitespace and newlines) and line
+        # comments are common enough to be worth finding without the regex engine, as long as no identifier with a
+        # higher priority could match instead. Only ASCII characters are tracked in `claimed`, so any other character
+        # is left to the bucket of every identifier.
+        self._single_characters: dict[str, int] = {}
+        self._runs: dict[str, int] = {}
+        self._line_comments: dict[str, tuple[str, int]] = {}
+        claimed: set[str] = set()
+        for identifier_id, identifier in enumerate(self._search_order):
+            if identifier.group == 0:
+                character = _single_character(identifier.compiled)
+                if character in _ASCII_CHARACTERS and character not in claimed:
+                    self._single_characters.setdefault(character, identifier_id)
+                character = _repeated_character(identifier.compiled)
+                if character in _ASCII_CHARACTERS and character not in claimed:
+                    self._runs.setdefault(character, identifier_id)
+                prefix = _line_comment_prefix(identifier.compiled)
+                if prefix is not None and prefix[0] in _ASCII_CHARACTERS and prefix[0] not in claimed:
+                    self._line_comments.setdefault(prefix[0], (prefix, identifier_id))
+            claimed |= first_characters[identifier_id]
+
+        # A run of newlines is handled on its own, since it also moves on to the next line
+        self._newlines: Optional[int] = self._runs.pop("\n", None)
+        self._dispatch = dispatch
+
+    def _bucket(self, candidates: tuple[int, ...]) -> _Bucket:
+        """
+        Builds the bucket for a character that the given identifiers can begin with. Keyword identifiers at the front of the candidates are turned into a lookup of whole words, and the rest are fused into one pattern.
+
+        Returns the keyword lookup (`None` if there are no keywords) and the segments to match as described in `_fuse`.
+        """
+        keywords: dict[str, int] = {}
+        while candidates and self._keyword_sets[candidates[0]] is not None:
+            for keyword in self._keyword_sets[candidates[0]]:
+                keywords.setdefault(keyword, candidates[0])
+            candidates = candidates[1:]
+        return (keywords or None, self._fuse(candidates))
+
+    def _fuse(self, identifier_ids: Iterable[int]) -> tuple[_Segment, ...]:
+        """
+        Fuses the given identifiers into one alternation, so that each position only enters the regex engine once. Alternatives are tried left to right, so the priority of the identifiers is kept. Each identifier is wrapped in its own group, and the index of that group maps a match back to its identifier. An identifier that can't be fused (see `_fusable`) is matched on its own instead, between the alternations of the identifiers around it.
+
+        Returns the segments to try in order, each a `match` method and a tuple indexed by the match's `lastindex`. For the group wrapping each fused identifier it holds the identifier id and the index of the group holding the token's value, and `None` for every other group. An identifier matched on its own holds its id and value group at every index.
+        """
+        segments: list[_Segment] = []
+        for fusable, run in groupby(identifier_ids, lambda identifier_id: self._fusable[identifier_id]):
+            if not fusable:
+                for identifier_id in run:
+                    identifier = self._search_order[identifier_id]
+                    segments.append((identifier.compiled.match, ((identifier_id, identifier.group),) * (identifier.compiled.groups + 1)))
+                continue
+            alternatives: list[str] = []
+            groups: list[Optional[tuple[int, int]]] = [None]
+            for identifier_id in run:
+                identifier = self._search_order[identifier_id]
+                alternatives.append(f"({identifier.compiled.pattern})")
+                groups.append((identifier_id, len(groups) + identifier.group))
+                groups.extend([None] * identifier.compiled.groups)
+            segments.append((_compile("|".join(alternatives)).match, tuple(groups)))
+        return tuple(segments)
+
     def tokenize(self, code: str) -> list[Token]:
         """
         Tokenizes the given code snippet into a `list` of `Tokens` using this `TokenizableLanguage`.
         """
         code = code.replace("\r", "")
-        tokens: list[Token] = []
+        types = tuple(identifier.type for identifier in self._search_order)
+        patterns = tuple(identifier.compiled for identifier in self._search_order)
+        return [
+            Token(types[identifier_id], code[value_start:value_start + end - start], None, start, line_number, line_start, patterns[identifier_id], code)
+            for identifier_id, start, end, line_number, line_start, value_start in self._scan(code)
+        ]
+
+    def tokenize_stream(self, code: str) -> TokenStream:
+        """
+        Tokenizes the given code snippet into a `TokenStream` using this `TokenizableLanguage`. This stores the tokens far more compactly than `tokenize`, which is useful for large snippets or for callers that only need the positions of each token.
+        """
+        code = code.replace("\r", "")
+        stream = TokenStream(code, self._search_order)
+        append_identifier_id = stream.identifier_ids.append
+        append_start = stream.starts.append
+        append_length = stream.lengths.append
+        append_value_start = stream.value_starts.append
+        append_line_number = stream.line_numbers.append
+        append_line_start = stream.line_starts.append
+        for identifier_id, start, end, line_number, line_start, value_start in self._scan(code):
+            append_identifier_id(identifier_id)
+            append_start(start)
+            append_length(end - start)
+            append_value_start(value_start)
+            append_line_number(line_number)
+            append_line_start(line_start)
+        return stream
+
+    def scan(self, code: str) -> Iterator[tuple[str, int, int, int, int, int]]:
+        """
+        Scans the given code snippet using this `TokenizableLanguage`, yielding a `(type, start, end, line_number, line_start, value_start)` tuple for each token without creating any `Tokens`. Carriage returns are removed from the code first, as in `tokenize`, and `start`, `end` and `value_start` are indices into the code without them.
+
+        The value of each token is the `end - start` characters from `value_start`, which is the same as `start` unless the value is a group that the token's regex doesn't begin with.
+        """
+        types = tuple(identifier.type for identifier in self._search_order)
+        for identifier_id, start, end, line_number, line_start, value_start in self._scan(code.replace("\r", "")):
+            yield types[identifier_id], start, end, line_number, line_start, value_start
+
+    def _scan(self, code: str) -> Iterator[tuple[int, int, int, int, int, int]]:
+        """
+        Scans the given code snippet, which must not contain carriage returns, yielding the identifier id, start, end, line number, line start and value start of each token. This is the loop shared by `tokenize`, `tokenize_stream` and `scan`.
+        """
+        if self._dispatch is None:
+            self._prepare()
+        code_length = len(code)
+        dispatch = self._dispatch
+        master = self._master
+        single_characters = self._single_characters
+        newlines = self._newlines
+        runs = self._runs
+        line_comments = self._line_comments
+        match_word = _WORD.match
         pos = 0
         line_number = 1
         line_pos = 0
-        while(code):
-            match_found = False
-            for identifier in self.identifiers + TokenizableLanguage.default_identifiers:
-                match = regex.match(identifier.regex, code)
-                if (match):
-                    str_match = match.group(identifier.group)
-                    token = Token(
-                        type = identifier.type, 
-                        value = str_match,
-                        full_match = match,
-                        start = pos,
-                        line_number = line_number,
-                        line_start = line_pos
-                    )
-                    code = code[len(str_match):]
-                    pos += len(str_match)
-                    tokens.append(token)
-                    if token.type == "newline":
-                        line_number += len(str_match)
-                        line_pos = 0
+        while pos < code_length:
+            character = code[pos]
+            value_start = pos
+            identifier_id = single_characters.get(character)
+            if identifier_id is not None:
+                end = pos + 1
+            elif character == "\n" and newlines is not None:
+                end = pos + 1
+                while end < code_length and code[end] == "\n":
+                    end += 1
+                yield newlines, pos, end, line_number, line_pos, pos
+                line_number += end - pos
+                line_pos = 0
+                pos = end
+                continue
+            elif character in runs:
+                identifier_id = runs[character]
+                end = pos + 1
+                while end < code_length and code[end] == character:
+                    end += 1
+            elif character in line_comments and code.startswith(line_comments[character][0], pos):
+                identifier_id = line_comments[character][1]
+                end = code.find("\n", pos)
+                if end == -1: end = code_length
+            else:
+                keywords, segments = dispatch.get(character, master)
+
+                # A keyword such as `(if|else)\b` matches exactly when the whole word at this position is one of them
+                if keywords is not None:
+                    end = match_word(code, pos).end()
+                    identifier_id = keywords.get(code[pos:end])
+                if identifier_id is None:
+                    for match_at, groups in segments:
+                        match = match_at(code, pos)
+                        if match: break
                     else:
-                        line_pos += len(str_match)
-                    match_found = True
-                    break
-            if not match_found: raise Exception("Unrecognized Token: " + code)
-        return tokens
+                        raise Exception("Unrecognized Token: " + code[pos:])
+
+                    # A fused identifier's own group closes last, so it is always the match's `lastindex`. An identifier
+                    # matched on its own may have no groups at all, which leaves `lastindex` as `None`.
+                    identifier_id, value_group = groups[match.lastindex or 0]
+
+                    # The token moves on by the length of its value, even when the value is a group that begins past
+                    # `pos`, such as the last repetition of a symbol
+                    value_start, value_end = match.span(value_group)
+                    end = pos + value_end - value_start
+            yield identifier_id, pos, end, line_number, line_pos, value_start
+
+            # Any token can span several lines, such as a string or a block comment
+            newline_count = code.count("\n", pos, end)
+            line_number += newline_count
+            line_pos = end - code.rfind("\n", pos, end) - 1 if newline_count else line_pos + end - pos
+            pos = end
 
 
 # Assembly
@@ -0,0 +1,266 @@
+import random
+import re
+import sys
+import unittest
+
+import tokenize_all
+from tokenize_all import TokenIdentifier, TokenizableLanguage
+
+
+LANGUAGES = {
+    name: language for name, language in vars(tokenize_all).items()
+    if isinstance(language, TokenizableLanguage)
+}
+
+SAMPLES = [
+    '#include <stdio.h>\nint main(void) {\n    printf("Hello, \\"world\\"!\\n");\n    return 0; // done\n}\n',
+    "public class Main {\n    public static void main(String[] args) {\n        System.out.println(1.5 + -2);\n    }\n}\n",
+    "def greet(name):\n    # Say hello\n    if name is not None:\n        return f'Hi {name}'\n    return None\n",
+    "SELECT id, name FROM users WHERE age >= 18 AND name LIKE 'A%' ORDER BY name;\n-- comment\n",
+    "main :: IO ()\nmain = do\n  let xs = [1, 2, 3]\n  print (map (+1) xs)\n",
+    "program hello\n  integer :: i\n  if (i .eq. 1 .and. .true.) then\n    print *, 'hi'\n  end if\nend program hello\n",
+    "package main\n\nimport \"fmt\"\n\nfunc main() {\n\tfmt.Println(\"hi\")\n}\n",
+    "local t = { a = 1, [\"b\"] = 2 }\nfor k, v in pairs(t) do\n  print(k, v) -- show\nend\n",
+    "fn main() -> i32 {\n    let mut v: Vec<u8> = Vec::new();\n    v.push(b'a');\n    0\n}\n",
+    "main :: proc() {\n\t/* a block\n\t   comment */\n\tx := 10\n\tfmt.println(\"multi\nline\", x)\n}\n",
+    "const MAX_SIZE = 10;\nlet value = obj.method (a, b)\n=> !== === && || ...rest\n\n\n\n",
+]
+
+CUSTOM_LANGUAGES = [
+    # A non-ASCII literal listed before a higher-priority identifier that can also begin with it
+    TokenizableLanguage([TokenIdentifier("lambda", r"λ"), TokenIdentifier("word", r"\w+")]),
+    # The same for a run of one character and for a line comment
+    TokenizableLanguage([
+        TokenIdentifier("comment", r"§[^\n]*"),
+        TokenIdentifier("dots", r"…+"),
+        TokenIdentifier("word", r"[^ a-z]+"),
+    ]),
+    # Shortcuts for literals, runs, line comments and keywords overridden by identifiers with a higher priority
+    TokenizableLanguage([
+        TokenIdentifier("semicolon", r";"),
+        TokenIdentifier("whitespace", r"[ \t]+"),
+        TokenIdentifier("comment", r"#[^\n]*"),
+        TokenIdentifier("keyword", r"(if|else|return)\b"),
+        TokenIdentifier("arrow", r"->|;;"),
+        TokenIdentifier("directive", r"#!?[a-z]+"),
+        TokenIdentifier("word", r"[a-z]+"),
+    ]),
+    # Identifiers with backreferences, repeated group names or global flags, which can't be fused with the others
+    TokenizableLanguage([
+        TokenIdentifier("quoted", r"""(['"]).*?\1"""),
+        TokenIdentifier("at", r"(?P<sigil>@)"),
+        TokenIdentifier("dollar", r"(?P<sigil>\$)"),
+        TokenIdentifier("shout", r"(?i)hey\b"),
+    ]),
+    # Case-insensitive literals, runs and line comments, which don't match just the character they're written with
+    TokenizableLanguage([TokenIdentifier("q", r"(?i)q")]),
+    TokenizableLanguage([TokenIdentifier("xs", r"(?i)x+")]),
+    TokenizableLanguage([TokenIdentifier("comment", r"(?i)rem[^\n]*")]),
+]
+
+
+def sequential_scan(language: TokenizableLanguage, code: str) -> tuple[list[tuple[str, int, int, int, int, int]], str]:
+    """
+    Tokenizes `code` by trying every identifier of `language` in turn at each position, without any of the shortcuts `scan` takes. Returns the tokens that were found and the error that stopped it, if any.
+    """
+    code = code.replace("\r", "")
+    identifiers = language.identifiers + [
+        identifier for identifier in TokenizableLanguage.default_identifiers if identifier not in language.identifiers
+    ]
+    tokens: list[tuple[str, int, int, int, int, int]] = []
+    pos = 0
+    while pos < len(code):
+        for identifier in identifiers:
+            match = re.compile(identifier.regex[1:]).match(code, pos)
+            if match:
+                break
+        else:
+            return tokens, "Unrecognized Token: " + code[pos:]
+        end = pos + len(match.group(identifier.group))
+        line_number = code.count("\n", 0, pos) + 1
+        line_start = pos - code.rfind("\n", 0, pos) - 1
+        tokens.append((identifier.type, pos, end, line_number, line_start, match.start(identifier.group)))
+        pos = end
+    return tokens, ""
+
+
+def fast_scan(language: TokenizableLanguage, code: str) -> tuple[list[tuple[str, int, int, int, int, int]], str]:
+    """Tokenizes `code` with `scan`, returning the tokens that were found and the error that stopped it, if any."""
+    tokens: list[tuple[str, int, int, int, int, int]] = []
+    try:
+        for token in language.scan(code):
+            tokens.append(token)
+    except Exception as error:
+        return tokens, str(error)
+    return tokens, ""
+
+
+class TestScan(unittest.TestCase):
+
+    def assertScansLikeSequential(self, language: TokenizableLanguage, code: str):
+        self.assertEqual(fast_scan(language, code), sequential_scan(language, code), repr(code))
+
+    def test_builtin_languages(self):
+        for name, language in LANGUAGES.items():
+            with self.subTest(language = name):
+                for sample in SAMPLES:
+                    self.assertScansLikeSequential(language, sample)
+
+    def test_builtin_languages_random(self):
+        fragments = [sample[start:start + 6] for sample in SAMPLES for start in range(0, len(sample), 3)]
+        fragments += ["λ", "…", "§", "é", "\t", "\r\n"]
+        generator = random.Random(0)
+        snippets = ["".join(generator.choices(fragments, k = generator.randint(1, 12))) for _ in range(200)]
+        for name, language in LANGUAGES.items():
+            with self.subTest(language = name):
+                for snippet in snippets:
+                    self.assertScansLikeSequential(language, snippet)
+
+    def test_custom_languages(self):
+        snippets = SAMPLES + [
+            "λx λ x", "…… §a\n§§ …", "if; ;; -> #if #!x # note\n\treturn else ifx", "say 'hi\" there' @$ HEY x \"q\"",
+            "xXx Q q REM a\nRem",
+        ]
+        for index, language in enumerate(CUSTOM_LANGUAGES):
+            with self.subTest(language = index):
+                for snippet in snippets:
+                    self.assertScansLikeSequential(language, snippet)
+
+    def test_unfusable_identifiers(self):
+        language = CUSTOM_LANGUAGES[3]
+        self.assertEqual(
+            [(token.type, token.value) for token in language.tokenize("'a\"b' @$ Hey")],
+            [("quoted", "'a\"b'"), ("whitespace", " "), ("at", "@"), ("dollar", "$"), ("whitespace", " "), ("shout", "Hey")]
+        )
+
+    @unittest.skipUnless(sys.version_info >= (3, 11), "atomic groups need Python 3.11")
+    def test_backreference_inside_atomic_group(self):
+        language = TokenizableLanguage([TokenIdentifier("quoted", r"""(?>(['"]).*?\1)""")])
+        self.assertEqual(
+            [(token.type, token.value) for token in language.tokenize("'a\"' \"b\"")],
+            [("quoted", "'a\"'"), ("whitespace", " "), ("quoted", '"b"')]
+        )
+
+    def test_caret_only_at_start(self):
+        language = TokenizableLanguage([TokenIdentifier("ab", r"^(a|b)")])
+        self.assertEqual([token.type for token in language.tokenize("a b")], ["ab", "whitespace", "ab"])
+        for pattern in (r"a|^b", r"a\Ab", r"(?m)a^"):
+            with self.subTest(pattern = pattern):
+                with self.assertRaisesRegex(Exception, "Unsupported Regex"):
+                    TokenIdentifier("ab", pattern)
+
+    def test_tokenize_matches_scan(self):
+        for name, language in LANGUAGES.items():
+            with self.subTest(language = name):
+                for sample in SAMPLES:
+                    expected, error = sequential_scan(language, sample)
+                    if error:
+                        continue
+                    for tokens in (language.tokenize(sample), language.tokenize_stream(sample)):
+                        self.assertEqual(
+                            [(token.type, token.start, token.value, token.line_number, token.line_start) for token in tokens],
+                            [(type, start, sample[value_start:value_start + end - start], line_number, line_start) for type, start, end, line_number, line_start, value_start in expected]
+                        )
+
+    def test_scan_tuples(self):
+        self.assertEqual(list(tokenize_all.Python.scan("x += f (1)\r\n")), [
+            ("identifier", 0, 1, 1, 0, 0),
+            ("whitespace", 1, 2, 1, 1, 1),
+            ("symbol", 2, 3, 1, 2, 3),
+            ("symbol", 3, 4, 1, 3, 3),
+            ("whitespace", 4, 5, 1, 4, 4),
+            ("function", 5, 6, 1, 5, 5),
+            ("whitespace", 6, 7, 1, 6, 6),
+            ("left parentheses", 7, 8, 1, 7, 7),
+            ("number", 8, 9, 1, 8, 8),
+            ("right parentheses", 9, 10, 1, 9, 9),
+            ("newline", 10, 11, 1, 10, 10),
+        ])
+
+    def test_scan_is_lazy(self):
+        tokens = tokenize_all.Python.scan("x ` y")
+        self.assertEqual(next(tokens), ("identifier", 0, 1, 1, 0, 0))
+        self.assertEqual(next(tokens), ("whitespace", 1, 2, 1, 1, 1))
+        with self.assertRaisesRegex(Exception, "Unrecognized Token: ` y"):
+            next(tokens)
+
+    def test_values(self):
+        language = TokenizableLanguage([TokenIdentifier("variable", r"\$(\w+)", 1)])
+        for tokens in (language.tokenize("$abc += foo ("), language.tokenize_stream("$abc += foo (")):
+            self.assertEqual(
+                [(token.type, token.value, token.start) for token in tokens],
+                [
+                    ("variable", "abc", 0), ("identifier", "c", 3), ("whitespace", " ", 4), ("symbol", "=", 5), ("symbol", "=", 6),
+                    ("whitespace", " ", 7), ("function", "foo", 8), ("whitespace", " ", 11), ("left parentheses", "(", 12),
+                ]
+            )
+
+
+class TestLineNumbers(unittest.TestCase):
+
+    def assertLines(self, language: TokenizableLanguage, code: str, expected: list[tuple[str, int, int]]):
+        self.assertEqual([(token.value, token.line_number, token.line_start) for token in language.tokenize(code)], expected)
+        self.assertEqual([(token.value, token.line_number, token.line_start) for token in language.tokenize_stream(code)], expected)
+
+    def test_after_multiline_string(self):
+        self.assertLines(tokenize_all.C, 's = "a\nb";\nz', [
+            ("s", 1, 0), (" ", 1, 1), ("=", 1, 2), (" ", 1, 3), ('"a\nb"', 1, 4), (";", 2, 2), ("\n", 2, 3), ("z", 3, 0),
+        ])
+
+    def test_after_block_comment(self):
+        self.assertLines(tokenize_all.Odin, "x /* a\nb */ y\n\n  z", [
+            ("x", 1, 0), (" ", 1, 1), ("/* a\nb */", 1, 2), (" ", 2, 4), ("y", 2, 5), ("\n\n", 2, 6), ("  ", 4, 0), ("z", 4, 2),
+        ])
+
+
+class TestToken(unittest.TestCase):
+
+    def test_full_match_is_matched_again_when_accessed(self):
+        code = "x = foo (1)"
+        for tokens in (tokenize_all.Python.tokenize(code), tokenize_all.Python.tokenize_stream(code)):
+            token = tokens[4]
+            self.assertEqual((token.type, token.value), ("function", "foo"))
+            self.assertIsNone(token._full_match)
+            self.assertEqual(token.full_match.group(), "foo (")
+            self.assertEqual(token.full_match.span(), (4, 9))
+            self.assertIs(token.full_match, token.full_match)
+
+    def test_full_match_given_or_set(self):
+        match = re.match(r"ab", "ab")
+        token = tokenize_all.Token("word", "ab", match, 0, 1, 0)
+        self.assertIs(token.full_match, match)
+        token.full_match = None
+        self.assertIsNone(token.full_match)
+
+
+class TestTokenStream(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = tokenize_all.Python.tokenize_stream("x = f(1)\r\n")
+
+    def test_arrays(self):
+        identifiers = [self.stream.identifiers[identifier_id].type for identifier_id in self.stream.identifier_ids]
+        self.assertEqual(self.stream.code, "x = f(1)\n")
+        self.assertEqual(identifiers, [
+            "identifier", "whitespace", "symbol", "whitespace", "function", "left parentheses", "number", "right parentheses", "newline",
+        ])
+        self.assertEqual(list(self.stream.starts), [0, 1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(list(self.stream.lengths), [1, 1, 1, 1, 1, 1, 1, 1, 1])
+        self.assertEqual(list(self.stream.value_starts), [0, 1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(list(self.stream.line_numbers), [1] * 9)
+        self.assertEqual(list(self.stream.line_starts), [0, 1, 2, 3, 4, 5, 6, 7, 8])
+
+    def test_indexing(self):
+        self.assertEqual(len(self.stream), 9)
+        token = self.stream[4]
+        self.assertEqual((token.type, token.value, token.start, token.line_number, token.line_start), ("function", "f", 4, 1, 4))
+        self.assertEqual(self.stream[-1].type, "newline")
+        self.assertEqual([token.value for token in self.stream[5:8]], ["(", "1", ")"])
+        self.assertEqual([token.value for token in self.stream[::4]], ["x", "f", "\n"])
+        self.assertEqual([token.value for token in self.stream], ["x", " ", "=", " ", "f", "(", "1", ")", "\n"])
+        with self.assertRaises(IndexError):
+            self.stream[9]
+
+
+if __name__ == "__main__":
+    unittest.main()